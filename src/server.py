@@ -4,12 +4,14 @@ MCP Integration Hub Server
 Provides tools for Notion, Slack, and GitHub integrations
 """
 
+import asyncio
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from mcp.server.fastmcp import FastMCP
 from typing import Optional, Dict, Any, List
+from contextlib import asynccontextmanager
 
 # Import our modules
 from src.config.settings import settings
@@ -20,6 +22,7 @@ from src.tools.notion.search import search_notion as notion_search
 from src.tools.notion.read import read_notion_page as notion_read_page
 from src.tools.notion.create import create_notion_page as notion_create_page
 from src.tools.notion.content import add_notion_content as notion_add_content
+from src.tools.notion.client import close_clients as close_notion_clients
 
 # Import Slack tools
 from src.tools.slack.messages import send_slack_message as slack_send_message
@@ -27,6 +30,7 @@ from src.tools.slack.channels import (
     read_slack_channel as slack_read_channel,
     get_slack_channel_info as slack_channel_info
 )
+from src.tools.slack.client import close_clients as close_slack_clients
 
 # Import GitHub tools
 from src.tools.github.repos import read_github_repo as github_read_repo
@@ -55,11 +59,29 @@ from src.tools.amplitude.funnel import (
 # Import Utils tools
 from src.tools.utils.time import get_san_francisco_time as utils_current_time
 
+# Number of MCP sessions currently running (SSE serves several at once)
+_active_sessions = 0
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Close the shared API clients once the last session ends"""
+    global _active_sessions
+    _active_sessions += 1
+    try:
+        yield {}
+    finally:
+        _active_sessions -= 1
+        if not _active_sessions:
+            await asyncio.gather(close_notion_clients(), close_slack_clients())
+
+
 # Create an MCP server
 mcp = FastMCP(
     name=settings.server_name,
     host=settings.server_host,
-    port=settings.server_port
+    port=settings.server_port,
+    lifespan=lifespan
 )
 
 # Initialize auth manager
@@ -171,7 +193,8 @@ async def send_slack_message(
     text: str,
     blocks: Optional[List[Dict]] = None,
     thread_ts: Optional[str] = None,
-    api_key: Optional[str] = None
+    api_key: Optional[str] = None,
+    channel_is_id: Optional[bool] = None
 ) -> Dict[str, Any]:
     """
     Send a message to a Slack channel with Block Kit support
@@ -182,13 +205,14 @@ async def send_slack_message(
         blocks: Block Kit formatted message blocks
         thread_ts: Thread timestamp to reply to
         api_key: Slack bot token (optional if set in environment)
+        channel_is_id: True if channel is a channel ID, to skip name resolution
     
     Returns:
         Dict with success status, message timestamp, and channel
     """
     if not api_key:
         api_key = settings.slack_bot_token
-    return await slack_send_message(channel, text, blocks, thread_ts, api_key)
+    return await slack_send_message(channel, text, blocks, thread_ts, api_key, channel_is_id)
 
 
 @mcp.tool()
@@ -10,7 +10,7 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime
 from urllib.parse import urlencode, quote
 
-from src.utils.rate_limiter import api_rate_limiter
+from src.utils.rate_limiter import RateLimitExceeded, get_api_rate_limiter
 
 
 # Special event types for retention analysis
@@ -73,7 +73,7 @@ class AmplitudeClient:
         Returns:
             Total cost for the query
         """
-        return api_rate_limiter.calculate_amplitude_cost(days, conditions, query_type_cost)
+        return get_api_rate_limiter().calculate_amplitude_cost(days, conditions, query_type_cost)
     
     def _calculate_days(self, start_date: str, end_date: str) -> int:
         """Calculate number of days between start and end date
@@ -111,13 +111,19 @@ class AmplitudeClient:
         Returns:
             API response as dictionary
         """
-        # Check and start rate limiting
-        if not api_rate_limiter.start_amplitude_request(user_id, cost):
+        # Hold one of the user's concurrent slots and record the cost for
+        # the duration of the request
+        try:
+            async with get_api_rate_limiter().amplitude_request(user_id, cost):
+                return await self._send_request(endpoint, params)
+        except RateLimitExceeded:
             return {
                 "error": "Rate limit exceeded. Too many concurrent requests or cost limit reached.",
                 "details": "Amplitude allows max 5 concurrent requests and 12000 cost per hour"
             }
-        
+    
+    async def _send_request(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Send an authenticated GET to the Amplitude API, returning errors as dicts"""
         try:
             url = f"{self.base_url}/{endpoint}"
             
@@ -186,9 +192,6 @@ class AmplitudeClient:
                 "error": "Request failed",
                 "message": str(e)
             }
-        finally:
-            # Always end rate limiting tracking
-            api_rate_limiter.end_amplitude_request(user_id)
     
     async def get_event_segmentation(
         self,
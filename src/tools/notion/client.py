@@ -4,22 +4,70 @@ Core client for interacting with Notion API
 """
 
 from typing import Optional, Dict, List, Any
+import asyncio
 import httpx
+import orjson
 import os
+import re
+
+from src.utils.cache import SimpleCache
+from src.utils.client_pool import ClientPool, token_hash
+
+
+# Short-lived cache of retrieved pages, shared across client instances
+_page_cache = SimpleCache(ttl_seconds=30)
+
+
+# Markdown line prefixes recognised by parse_markdown_to_blocks
+_MD_RE = re.compile(
+    r'(?P<h3>### )|(?P<h2>## )|(?P<h1># )|(?P<bul>[-*] )|(?P<num>\d\. )'
+    r'|(?P<code>```)|(?P<hr>(?:---|\*\*\*|___)$)'
+)
+
+# Line prefixes that end a paragraph (the same set the parser has always used,
+# which is looser than _MD_RE: "#tag" or "-dash" also start a new paragraph)
+_PARAGRAPH_BREAKS = ('#', '-', '*', '```')
+
+# Notion block type for each single-line _MD_RE match
+_MD_BLOCK_TYPES = {
+    'h1': 'heading_1',
+    'h2': 'heading_2',
+    'h3': 'heading_3',
+    'bul': 'bulleted_list_item',
+    'num': 'numbered_list_item',
+}
+
+# Text prefix for each rich-text block type rendered by parse_blocks_to_text
+_TEXT_BLOCK_PREFIXES = {
+    'heading_1': '# ',
+    'heading_2': '## ',
+    'heading_3': '### ',
+    'bulleted_list_item': '• ',
+    'numbered_list_item': '1. ',
+}
 
 
 class NotionClient:
     """Wrapper for Notion API operations"""
     
+    __slots__ = ("api_key", "base_url", "headers", "client", "cache_prefix")
+    
     def __init__(self, api_key: str):
         self.api_key = api_key
+        # Namespace cached pages per integration without keeping the raw key
+        self.cache_prefix = token_hash(api_key)
         self.base_url = "https://api.notion.com/v1"
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json",
             "Notion-Version": "2022-06-28"  # Latest stable version
         }
-        self.client = httpx.AsyncClient(headers=self.headers)
+        # HTTP/2 lets concurrent requests share one multiplexed connection
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
     
     async def search(self, query: str, filter_type: Optional[str] = None) -> Dict:
         """Search across all pages and databases"""
@@ -35,10 +83,25 @@ class NotionClient:
         return response.json()
     
     async def get_page(self, page_id: str) -> Dict:
-        """Retrieve a specific page"""
+        """Retrieve a specific page (cached for a short time)"""
+        cache_key = f"{self.cache_prefix}:{page_id}"
+        cached_page = _page_cache.get(cache_key)
+        if cached_page is not None:
+            return cached_page
+        
         response = await self.client.get(f"{self.base_url}/pages/{page_id}")
         response.raise_for_status()
-        return response.json()
+        page = response.json()
+        _page_cache.set(cache_key, page)
+        return page
+    
+    def invalidate_page(self, page_id: str) -> None:
+        """Drop a page from the cache after writing to it"""
+        _page_cache.delete(f"{self.cache_prefix}:{page_id}")
+    
+    async def get_pages(self, page_ids: List[str]) -> List[Dict]:
+        """Retrieve several pages concurrently"""
+        return await asyncio.gather(*(self.get_page(page_id) for page_id in page_ids))
     
     async def get_page_content(self, page_id: str) -> List[Dict]:
         """Retrieve all blocks (content) from a page"""
@@ -71,9 +134,10 @@ class NotionClient:
         if children:
             payload["children"] = children
         
+        # Pre-serialise; Content-Type is already set on the session headers
         response = await self.client.post(
             f"{self.base_url}/pages",
-            json=payload
+            content=orjson.dumps(payload)
         )
         response.raise_for_status()
         return response.json()
@@ -82,11 +146,13 @@ class NotionClient:
         """Append blocks to a page or block"""
         payload = {"children": children}
         
+        # Pre-serialise; Content-Type is already set on the session headers
         response = await self.client.patch(
             f"{self.base_url}/blocks/{parent_id}/children",
-            json=payload
+            content=orjson.dumps(payload)
         )
         response.raise_for_status()
+        self.invalidate_page(parent_id)
         return response.json()
     
     async def create_database(self, parent: Dict, title: List[Dict], properties: Dict) -> Dict:
@@ -97,9 +163,10 @@ class NotionClient:
             "properties": properties
         }
         
+        # Pre-serialise; Content-Type is already set on the session headers
         response = await self.client.post(
             f"{self.base_url}/databases",
-            json=payload
+            content=orjson.dumps(payload)
         )
         response.raise_for_status()
         return response.json()
@@ -109,14 +176,32 @@ class NotionClient:
         await self.client.aclose()
 
 
+# Shared clients so connections and HTTP/2 sessions are reused across tool calls
+_clients = ClientPool(NotionClient)
+
+
+def get_client(api_key: str) -> NotionClient:
+    """Return the shared NotionClient for an API key, creating it on first use"""
+    return _clients.get(api_key)
+
+
+async def close_clients():
+    """Close all shared clients (called when the server shuts down)"""
+    await _clients.close_all()
+
+
 # Helper functions for processing Notion data
 def extract_title(notion_object: Dict) -> str:
     """Extract title from various Notion object types"""
     # For pages with properties
-    if "properties" in notion_object:
-        for prop in notion_object["properties"].values():
-            if prop.get("type") == "title" and prop.get("title"):
-                return "".join([t.get("plain_text", "") for t in prop["title"]])
+    properties = notion_object.get("properties")
+    if properties:
+        title_prop = next(
+            (p for p in properties.values() if p.get("type") == "title" and p.get("title")),
+            None
+        )
+        if title_prop:
+            return "".join([t.get("plain_text", "") for t in title_prop["title"]])
     
     # For database/page results from search
     if "title" in notion_object:
@@ -163,38 +248,27 @@ def parse_blocks_to_text(blocks: List[Dict]) -> str:
     for block in blocks:
         block_type = block.get("type")
         
-        if block_type == "paragraph" and block.get("paragraph", {}).get("rich_text"):
-            text = "".join([t.get("plain_text", "") for t in block["paragraph"]["rich_text"]])
-            if text:
-                text_parts.append(text)
-        
-        elif block_type == "heading_1" and block.get("heading_1", {}).get("rich_text"):
-            text = "# " + "".join([t.get("plain_text", "") for t in block["heading_1"]["rich_text"]])
-            text_parts.append(text)
-        
-        elif block_type == "heading_2" and block.get("heading_2", {}).get("rich_text"):
-            text = "## " + "".join([t.get("plain_text", "") for t in block["heading_2"]["rich_text"]])
-            text_parts.append(text)
+        if block_type == "divider":
+            text_parts.append("---")
+            continue
         
-        elif block_type == "heading_3" and block.get("heading_3", {}).get("rich_text"):
-            text = "### " + "".join([t.get("plain_text", "") for t in block["heading_3"]["rich_text"]])
-            text_parts.append(text)
+        inner = block.get(block_type) if block_type else None
+        rich_text = inner.get("rich_text") if inner else None
+        if not rich_text:
+            continue
         
-        elif block_type == "bulleted_list_item" and block.get("bulleted_list_item", {}).get("rich_text"):
-            text = "• " + "".join([t.get("plain_text", "") for t in block["bulleted_list_item"]["rich_text"]])
-            text_parts.append(text)
+        text = "".join([t.get("plain_text", "") for t in rich_text])
         
-        elif block_type == "numbered_list_item" and block.get("numbered_list_item", {}).get("rich_text"):
-            text = "1. " + "".join([t.get("plain_text", "") for t in block["numbered_list_item"]["rich_text"]])
-            text_parts.append(text)
+        if block_type == "paragraph":
+            if text:
+                text_parts.append(text)
         
-        elif block_type == "code" and block.get("code", {}).get("rich_text"):
-            code = "".join([t.get("plain_text", "") for t in block["code"]["rich_text"]])
-            lang = block["code"].get("language", "")
-            text_parts.append(f"```{lang}\n{code}\n```")
+        elif block_type in _TEXT_BLOCK_PREFIXES:
+            text_parts.append(_TEXT_BLOCK_PREFIXES[block_type] + text)
         
-        elif block_type == "divider":
-            text_parts.append("---")
+        elif block_type == "code":
+            lang = inner.get("language", "")
+            text_parts.append(f"```{lang}\n{text}\n```")
     
     return "\n\n".join(text_parts)
 
@@ -285,24 +359,17 @@ def parse_markdown_to_blocks(markdown_text: str) -> List[Dict]:
             i += 1
             continue
         
-        # Headings
-        if line.startswith('### '):
-            blocks.append(create_heading_block(line[4:], 3))
-        elif line.startswith('## '):
-            blocks.append(create_heading_block(line[3:], 2))
-        elif line.startswith('# '):
-            blocks.append(create_heading_block(line[2:], 1))
+        m = _MD_RE.match(line)
+        kind = m.lastgroup if m else None
         
-        # Lists
-        elif line.startswith('- ') or line.startswith('* '):
-            blocks.append(create_bullet_list_item(line[2:]))
-        elif line[0].isdigit() and line[1:3] == '. ':
-            blocks.append(create_numbered_list_item(line[3:]))
+        # Headings and list items
+        if kind in _MD_BLOCK_TYPES:
+            blocks.append(create_text_block(line[m.end():], _MD_BLOCK_TYPES[kind]))
         
         # Code blocks
-        elif line.startswith('```'):
+        elif kind == 'code':
             code_lines = []
-            language = line[3:].strip() or "plain text"
+            language = line[m.end():].strip() or "plain text"
             i += 1
             while i < len(lines) and not lines[i].startswith('```'):
                 code_lines.append(lines[i])
@@ -310,18 +377,17 @@ def parse_markdown_to_blocks(markdown_text: str) -> List[Dict]:
             blocks.append(create_code_block('\n'.join(code_lines), language))
         
         # Divider
-        elif line in ['---', '***', '___']:
+        elif kind == 'hr':
             blocks.append(create_divider_block())
         
         # Regular paragraph
         else:
             # Collect continuous lines as a paragraph
-            paragraph_lines = [line]
+            start = i
             i += 1
-            while i < len(lines) and lines[i].strip() and not any(lines[i].startswith(p) for p in ['#', '-', '*', '```', '---']):
-                paragraph_lines.append(lines[i].strip())
+            while i < len(lines) and lines[i].strip() and not lines[i].startswith(_PARAGRAPH_BREAKS):
                 i += 1
-            blocks.append(create_text_block(' '.join(paragraph_lines)))
+            blocks.append(create_text_block(' '.join([line, *map(str.strip, lines[start + 1:i])])))
             i -= 1
         
         i += 1
@@ -5,7 +5,7 @@ Tool for adding content to existing Notion pages
 
 from typing import Optional, Dict, Any
 import os
-from .client import NotionClient, create_text_block, parse_markdown_to_blocks
+from .client import get_client, create_text_block, parse_markdown_to_blocks
 
 
 async def add_notion_content(
@@ -30,7 +30,7 @@ async def add_notion_content(
     if not notion_api_key:
         return {"error": "No API key provided"}
     
-    client = NotionClient(notion_api_key)
+    client = get_client(notion_api_key)
     try:
         # Parse content into blocks
         if content_format == "markdown":
@@ -52,5 +52,3 @@ async def add_notion_content(
         }
     except Exception as e:
         return {"error": f"Failed to add content: {str(e)}"}
-    finally:
-        await client.close() 
\ No newline at end of file
@@ -5,7 +5,7 @@ Tool for creating new pages in Notion
 
 from typing import Optional, Dict, Any
 import os
-from .client import NotionClient, create_text_block, parse_markdown_to_blocks
+from .client import get_client, create_text_block, parse_markdown_to_blocks
 
 
 async def create_notion_page(
@@ -32,7 +32,7 @@ async def create_notion_page(
     if not notion_api_key:
         return {"error": "No API key provided"}
     
-    client = NotionClient(notion_api_key)
+    client = get_client(notion_api_key)
     try:
         # Prepare parent object
         parent = {"page_id": parent_page_id}
@@ -65,5 +65,3 @@ async def create_notion_page(
         }
     except Exception as e:
         return {"error": f"Failed to create page: {str(e)}"}
-    finally:
-        await client.close() 
\ No newline at end of file
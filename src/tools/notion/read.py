@@ -4,8 +4,9 @@ Tool for reading specific Notion pages and their content
 """
 
 from typing import Optional, Dict, Any
+import asyncio
 import os
-from .client import NotionClient, extract_title, simplify_properties, parse_blocks_to_text
+from .client import get_client, extract_title, simplify_properties, parse_blocks_to_text
 
 
 async def read_notion_page(
@@ -28,10 +29,16 @@ async def read_notion_page(
     if not notion_api_key:
         return {"error": "No API key provided"}
     
-    client = NotionClient(notion_api_key)
+    client = get_client(notion_api_key)
     try:
-        # Get page metadata
-        page_data = await client.get_page(page_id)
+        # Get page metadata, fetching the content alongside it on the same
+        # (HTTP/2 multiplexed) connection
+        if include_content:
+            page_data, blocks = await asyncio.gather(
+                client.get_page(page_id), client.get_page_content(page_id)
+            )
+        else:
+            page_data = await client.get_page(page_id)
         
         result = {
             "id": page_data["id"],
@@ -42,13 +49,10 @@ async def read_notion_page(
             "last_edited_time": page_data.get("last_edited_time", "")
         }
         
-        # Optionally get page content
+        # Optionally include page content
         if include_content:
-            blocks = await client.get_page_content(page_id)
             result["content"] = parse_blocks_to_text(blocks)
         
         return result
     except Exception as e:
         return {"error": f"Failed to read page: {str(e)}"}
-    finally:
-        await client.close() 
\ No newline at end of file
@@ -6,7 +6,7 @@ Tool for searching pages and databases in Notion
 from typing import Optional, Dict, Any
 import os
 from mcp.server.fastmcp import FastMCP
-from .client import NotionClient, extract_title
+from .client import get_client, extract_title
 
 
 async def search_notion(
@@ -30,7 +30,7 @@ async def search_notion(
     if not notion_api_key:
         return {"error": "No API key provided. Set NOTION_API_KEY env var or pass api_key parameter"}
     
-    client = NotionClient(notion_api_key)
+    client = get_client(notion_api_key)
     try:
         results = await client.search(query, filter_type)
         
@@ -53,5 +53,3 @@ async def search_notion(
         }
     except Exception as e:
         return {"error": f"Failed to search Notion: {str(e)}"}
-    finally:
-        await client.close() 
\ No newline at end of file
@@ -4,9 +4,25 @@ Tools for reading channel messages and getting channel information
 """
 
 from typing import Optional, Dict, List, Any
+import asyncio
 import os
-from .client import SlackClient
-from .utils import resolve_channel_id, format_message_data, parse_message_text
+from itertools import islice
+from .client import get_client
+from .utils import (
+    resolve_channel_id, find_channel_id, format_message_data, parse_message_text, info_batcher
+)
+
+
+# conversations.replies calls in flight at once per read_slack_channel
+# (a Tier 3 method, so an unbounded fan-out just collects 429s)
+_THREAD_FETCH_CONCURRENCY = 8
+
+
+def _format_message(message: Dict) -> Dict:
+    """Format a message and add its parsed text"""
+    formatted_msg = format_message_data(message)
+    formatted_msg["parsed_text"] = parse_message_text(formatted_msg["text"])
+    return formatted_msg
 
 
 async def read_slack_channel(
@@ -35,7 +51,7 @@ async def read_slack_channel(
     if not slack_token:
         return {"error": "No API key provided. Please provide api_key or set SLACK_BOT_TOKEN environment variable"}
     
-    client = SlackClient(slack_token)
+    client = get_client(slack_token)
     try:
         # Resolve channel ID
         try:
@@ -44,7 +60,7 @@ async def read_slack_channel(
             channel_id = channel
         
         # Get channel info first
-        channel_info_response = await client.conversations_info(channel_id)
+        channel_info_response = await info_batcher.get(client, channel_id)
         if not channel_info_response.get("ok"):
             error = channel_info_response.get("error", "Unknown error")
             if error == "channel_not_found":
@@ -58,10 +74,9 @@ async def read_slack_channel(
         # Fetch messages with pagination
         all_messages = []
         cursor = None
-        remaining = limit
         
-        while remaining > 0:
-            batch_size = min(remaining, 100)  # Slack's max limit per request
+        while len(all_messages) < limit:
+            batch_size = min(limit - len(all_messages), 100)  # Slack's max limit per request
             
             response = await client.conversations_history(
                 channel=channel_id,
@@ -82,35 +97,41 @@ async def read_slack_channel(
             
             # Check if we need to continue pagination
             cursor = response.get("response_metadata", {}).get("next_cursor")
-            remaining -= len(messages)
             
-            if not cursor or not response.get("has_more", False):
+            if not cursor or not response.get("has_more", False) or len(all_messages) >= limit:
                 break
         
         # Format messages
-        formatted_messages = []
-        for message in all_messages[:limit]:  # Ensure we don't exceed requested limit
-            formatted_msg = format_message_data(message)
-            formatted_msg["parsed_text"] = parse_message_text(formatted_msg["text"])
+        selected = all_messages[:limit]  # Ensure we don't exceed requested limit
+        formatted_messages = list(map(_format_message, selected))
+        
+        # Fetch thread replies concurrently for messages that have them
+        if include_threads:
+            threaded = [
+                idx for idx, message in enumerate(selected)
+                if message.get("thread_ts") and message.get("reply_count", 0) > 0
+            ]
+            semaphore = asyncio.Semaphore(_THREAD_FETCH_CONCURRENCY)
             
-            # Fetch thread replies if requested and message has replies
-            if include_threads and message.get("thread_ts") and message.get("reply_count", 0) > 0:
-                thread_response = await client.conversations_replies(
-                    channel=channel_id,
-                    ts=message["thread_ts"]
-                )
-                
-                if thread_response.get("ok"):
-                    replies = thread_response.get("messages", [])[1:]  # Skip the parent message
-                    formatted_msg["thread_replies"] = [
-                        {
-                            **format_message_data(reply),
-                            "parsed_text": parse_message_text(reply.get("text", ""))
-                        }
-                        for reply in replies
-                    ]
+            async def fetch_replies(ts: str) -> Dict:
+                async with semaphore:
+                    return await client.conversations_replies(channel=channel_id, ts=ts)
+            
+            thread_responses = await asyncio.gather(
+                *(fetch_replies(selected[idx]["thread_ts"]) for idx in threaded),
+                return_exceptions=True
+            )
             
-            formatted_messages.append(formatted_msg)
+            for idx, thread_response in zip(threaded, thread_responses):
+                # Skip threads whose fetch failed rather than losing the messages
+                if isinstance(thread_response, BaseException):
+                    continue
+                if thread_response.get("ok"):
+                    # Skip the parent message without copying the list
+                    formatted_messages[idx]["thread_replies"] = list(map(
+                        _format_message,
+                        islice(thread_response.get("messages", ()), 1, None)
+                    ))
         
         return {
             "success": True,
@@ -133,8 +154,6 @@ async def read_slack_channel(
             "success": False,
             "error": f"Failed to read channel: {str(e)}"
         }
-    finally:
-        await client.close()
 
 
 async def get_slack_channel_info(
@@ -157,41 +176,22 @@ async def get_slack_channel_info(
     if not slack_token:
         return {"error": "No API key provided. Please provide api_key or set SLACK_BOT_TOKEN environment variable"}
     
-    client = SlackClient(slack_token)
+    client = get_client(slack_token)
     try:
         # Remove # if present
         clean_channel_name = channel_name.lstrip('#')
         
-        # Search for channel by name
-        found_channel = None
-        cursor = None
-        
-        while True:
-            response = await client.conversations_list(cursor=cursor)
-            
-            if not response.get("ok"):
-                return {"error": f"Failed to list channels: {response.get('error')}"}
-            
-            for channel in response.get("channels", []):
-                if channel["name"] == clean_channel_name:
-                    found_channel = channel
-                    break
-            
-            if found_channel:
-                break
-            
-            cursor = response.get("response_metadata", {}).get("next_cursor")
-            if not cursor:
-                break
-        
-        if not found_channel:
+        # Shares the channel ID cache and conversations.list scan with
+        # resolve_channel_id
+        channel_id = await find_channel_id(client, clean_channel_name)
+        if channel_id is None:
             return {
                 "success": False,
                 "error": f"Channel '{channel_name}' not found"
             }
         
         # Get detailed channel info
-        info_response = await client.conversations_info(found_channel["id"])
+        info_response = await info_batcher.get(client, channel_id)
         if not info_response.get("ok"):
             return {"error": f"Failed to get channel details: {info_response.get('error')}"}
         
@@ -231,7 +231,7 @@ async def get_slack_channel_info(
             
             while True:
                 members_response = await client.conversations_members(
-                    channel=found_channel["id"],
+                    channel=channel_id,
                     cursor=cursor
                 )
                 
@@ -254,6 +254,4 @@ async def get_slack_channel_info(
         return {
             "success": False,
             "error": f"Failed to get channel info: {str(e)}"
-        }
-    finally:
-        await client.close() 
\ No newline at end of file
+        } 
\ No newline at end of file
@@ -3,22 +3,75 @@ Slack Client Module
 Core client for interacting with Slack API
 """
 
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, AsyncIterator
+import asyncio
 import httpx
 import json
+import orjson
+
+from src.utils.client_pool import ClientPool, token_hash
+from src.utils.rate_limiter import get_api_rate_limiter
+
+
+# Times a request is retried after Slack answers 429 Too Many Requests
+MAX_RATE_LIMIT_RETRIES = 3
 
 
 class SlackClient:
     """Wrapper for Slack API operations"""
     
+    __slots__ = ("token", "base_url", "headers", "client", "rate_limit_key")
+    
     def __init__(self, token: str):
         self.token = token
+        # Key for this workspace's bucket in get_api_rate_limiter().limits["slack"]
+        self.rate_limit_key = ("slack", token_hash(token))
         self.base_url = "https://slack.com/api"
         self.headers = {
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json; charset=utf-8"
         }
-        self.client = httpx.AsyncClient(headers=self.headers)
+        # Large keep-alive pool plus HTTP/2 so bursts of calls reuse connections
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=1000,
+                max_keepalive_connections=100,
+                keepalive_expiry=60.0
+            ),
+            timeout=httpx.Timeout(10.0, connect=5.0)
+        )
+    
+    async def _request(self, method: str, url: str, **kwargs) -> Dict:
+        """
+        Send a request, backing off and retrying when Slack rate limits us
+        
+        On 429 the Retry-After delay is also recorded on the shared Slack
+        token bucket so concurrent calls for this workspace wait it out too.
+        """
+        bucket = get_api_rate_limiter().limits["slack"].get_bucket(self.rate_limit_key)
+        
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            # Honour a back-off window recorded by an earlier 429
+            backoff = bucket.wait_time(0)
+            if backoff > 0:
+                await asyncio.sleep(backoff)
+            
+            response = await self.client.request(method, url, **kwargs)
+            if response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                break
+            
+            try:
+                retry_after = float(response.headers.get("Retry-After", "1"))
+            except ValueError:
+                retry_after = 1.0
+            
+            # Drain the bucket until Slack says we may send again
+            bucket.drain(retry_after)
+        
+        response.raise_for_status()
+        return orjson.loads(response.content)
     
     async def post_message(self, channel: str, text: str, 
                           blocks: Optional[List[Dict]] = None,
@@ -35,12 +88,10 @@ class SlackClient:
         if thread_ts:
             payload["thread_ts"] = thread_ts
         
-        response = await self.client.post(
-            f"{self.base_url}/chat.postMessage",
-            json=payload
+        # Pre-serialise; Content-Type is already set on the session headers
+        return await self._request(
+            "POST", f"{self.base_url}/chat.postMessage", content=orjson.dumps(payload)
         )
-        response.raise_for_status()
-        return response.json()
     
     async def conversations_list(self, cursor: Optional[str] = None,
                                limit: int = 100,
@@ -54,12 +105,37 @@ class SlackClient:
         if cursor:
             params["cursor"] = cursor
         
-        response = await self.client.get(
-            f"{self.base_url}/conversations.list",
-            params=params
-        )
-        response.raise_for_status()
-        return response.json()
+        return await self._request("GET", f"{self.base_url}/conversations.list", params=params)
+    
+    async def iter_conversations(self, types: str = "public_channel,private_channel",
+                                 page_size: int = 1000) -> AsyncIterator[Dict]:
+        """
+        Yield every conversation in the workspace, one channel at a time
+        
+        Handles the cursor internally and requests the next page while the
+        current one is being consumed. Raises ValueError if Slack reports
+        an error.
+        """
+        inflight = asyncio.create_task(self.conversations_list(limit=page_size, types=types))
+        try:
+            while inflight:
+                response = await inflight
+                inflight = None
+                
+                if not response.get("ok"):
+                    raise ValueError(f"Failed to list channels: {response.get('error')}")
+                
+                cursor = response.get("response_metadata", {}).get("next_cursor")
+                if cursor:
+                    inflight = asyncio.create_task(
+                        self.conversations_list(cursor=cursor, limit=page_size, types=types)
+                    )
+                
+                for channel in response.get("channels", []):
+                    yield channel
+        finally:
+            if inflight:
+                inflight.cancel()
     
     async def conversations_history(self, channel: str,
                                   cursor: Optional[str] = None,
@@ -79,23 +155,13 @@ class SlackClient:
         if latest:
             params["latest"] = latest
         
-        response = await self.client.get(
-            f"{self.base_url}/conversations.history",
-            params=params
-        )
-        response.raise_for_status()
-        return response.json()
+        return await self._request("GET", f"{self.base_url}/conversations.history", params=params)
     
     async def conversations_info(self, channel: str) -> Dict:
         """Get channel information"""
         params = {"channel": channel}
         
-        response = await self.client.get(
-            f"{self.base_url}/conversations.info",
-            params=params
-        )
-        response.raise_for_status()
-        return response.json()
+        return await self._request("GET", f"{self.base_url}/conversations.info", params=params)
     
     async def conversations_members(self, channel: str,
                                   cursor: Optional[str] = None,
@@ -109,12 +175,7 @@ class SlackClient:
         if cursor:
             params["cursor"] = cursor
         
-        response = await self.client.get(
-            f"{self.base_url}/conversations.members",
-            params=params
-        )
-        response.raise_for_status()
-        return response.json()
+        return await self._request("GET", f"{self.base_url}/conversations.members", params=params)
     
     async def conversations_replies(self, channel: str, ts: str,
                                   cursor: Optional[str] = None,
@@ -129,24 +190,28 @@ class SlackClient:
         if cursor:
             params["cursor"] = cursor
         
-        response = await self.client.get(
-            f"{self.base_url}/conversations.replies",
-            params=params
-        )
-        response.raise_for_status()
-        return response.json()
+        return await self._request("GET", f"{self.base_url}/conversations.replies", params=params)
     
     async def users_info(self, user: str) -> Dict:
         """Get user information"""
         params = {"user": user}
         
-        response = await self.client.get(
-            f"{self.base_url}/users.info",
-            params=params
-        )
-        response.raise_for_status()
-        return response.json()
+        return await self._request("GET", f"{self.base_url}/users.info", params=params)
     
     async def close(self):
         """Close the HTTP client"""
-        await self.client.aclose() 
\ No newline at end of file
+        await self.client.aclose()
+
+
+# Shared clients keyed by token hash so connections are reused across tool calls
+_clients = ClientPool(SlackClient)
+
+
+def get_client(token: str) -> SlackClient:
+    """Return the shared SlackClient for a token, creating it on first use"""
+    return _clients.get(token)
+
+
+async def close_clients():
+    """Close all shared clients (called when the server shuts down)"""
+    await _clients.close_all()
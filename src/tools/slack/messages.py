@@ -4,17 +4,43 @@ Tool for sending messages to Slack
 """
 
 from typing import Optional, Dict, List, Any
+import asyncio
 import os
-from .client import SlackClient
+from .client import SlackClient, get_client
 from .utils import resolve_channel_id, markdown_to_blocks
 
 
+# Bot token from the environment, read once at import
+_DEFAULT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
+
+# Helpful messages for common chat.postMessage errors
+_ERROR_MESSAGES: Dict[str, str] = {
+    "channel_not_found": "Channel '{channel}' not found or bot doesn't have access",
+    "not_in_channel": "Bot must be added to channel '{channel}' first",
+    "invalid_auth": "Invalid authentication token",
+    "missing_scope": "Bot token missing required scope: chat:write",
+}
+
+
+async def _resolve_channel(client: SlackClient, channel: str, channel_is_id: Optional[bool]) -> str:
+    """Resolve a channel name to an ID, falling back to the value as given"""
+    if channel_is_id:
+        return channel
+    try:
+        return await resolve_channel_id(client, channel)
+    except ValueError:
+        # If channel resolution fails, try using the channel as-is
+        # (it might be a valid ID we don't recognize)
+        return channel
+
+
 async def send_slack_message(
     channel: str,
     text: str,
     blocks: Optional[List[Dict]] = None,
     thread_ts: Optional[str] = None,
-    api_key: Optional[str] = None
+    api_key: Optional[str] = None,
+    channel_is_id: Optional[bool] = None
 ) -> Dict[str, Any]:
     """
     Send a message to a Slack channel
@@ -25,27 +51,26 @@ async def send_slack_message(
         blocks: Block Kit formatted message blocks
         thread_ts: Thread timestamp to reply to
         api_key: Slack bot token
+        channel_is_id: Set to True when channel is known to be an ID to skip resolution
     
     Returns:
         Dict with success status, message ts, and channel
     """
-    slack_token = api_key or os.getenv("SLACK_BOT_TOKEN")
+    slack_token = api_key or _DEFAULT_TOKEN
     if not slack_token:
         return {"error": "No API key provided. Please provide api_key or set SLACK_BOT_TOKEN environment variable"}
     
-    client = SlackClient(slack_token)
+    client = get_client(slack_token)
     try:
-        # Resolve channel ID if channel is a name
-        try:
-            channel_id = await resolve_channel_id(client, channel)
-        except ValueError as e:
-            # If channel resolution fails, try using the channel as-is
-            # (it might be a valid ID we don't recognize)
-            channel_id = channel
-        
         # If blocks not provided but text contains markdown, convert it
+        # in a worker thread while the channel ID is being resolved
         if not blocks and text and any(marker in text for marker in ['#', '*', '```', '-', '1.']):
-            blocks = markdown_to_blocks(text)
+            channel_id, blocks = await asyncio.gather(
+                _resolve_channel(client, channel, channel_is_id),
+                asyncio.to_thread(markdown_to_blocks, text)
+            )
+        else:
+            channel_id = await _resolve_channel(client, channel, channel_is_id)
         
         # Send message
         result = await client.post_message(
@@ -65,17 +90,10 @@ async def send_slack_message(
             }
         else:
             error = result.get("error", "Unknown error")
-            error_msg = f"Failed to send message: {error}"
             
             # Provide helpful error messages
-            if error == "channel_not_found":
-                error_msg = f"Channel '{channel}' not found or bot doesn't have access"
-            elif error == "not_in_channel":
-                error_msg = f"Bot must be added to channel '{channel}' first"
-            elif error == "invalid_auth":
-                error_msg = "Invalid authentication token"
-            elif error == "missing_scope":
-                error_msg = "Bot token missing required scope: chat:write"
+            template = _ERROR_MESSAGES.get(error)
+            error_msg = template.format(channel=channel) if template else f"Failed to send message: {error}"
             
             return {
                 "success": False,
@@ -87,6 +105,4 @@ async def send_slack_message(
         return {
             "success": False,
             "error": f"Failed to send message: {str(e)}"
-        }
-    finally:
-        await client.close() 
\ No newline at end of file
+        } 
\ No newline at end of file
@@ -3,8 +3,151 @@ Slack Utility Functions
 Helper functions for Slack operations
 """
 
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple
+import asyncio
+import re
+from contextlib import aclosing
 from .client import SlackClient
+from src.utils.cache import SimpleCache
+
+
+# User mentions, channel mentions, named links and plain links in one pass
+_MRKDWN_RE = re.compile(
+    r'<@(U\w+)>'
+    r'|<#C\w+\|([^>]+)>'
+    r'|<(https?://[^|>]+)\|([^>]+)>'
+    r'|<(https?://[^>]+)>'
+)
+
+# Numbered list item such as "1. Item": a digit and at most one more
+# character before the first ". " (so "2024. year" stays plain text)
+_NUM_LIST = re.compile(r'(\d.??)\. (.*)')
+
+# Channel name -> channel ID, namespaced per token
+_channel_id_cache = SimpleCache(ttl_seconds=3600)
+
+
+def _channel_cache_key(client: SlackClient, channel_name: str) -> str:
+    """Build a channel cache key without storing the raw token"""
+    return f"{client.rate_limit_key[1]}:{channel_name}"
+
+
+class _InfoBatcher:
+    """
+    Coalesce conversations.info lookups issued within a short window
+    
+    Concurrent callers asking for the same channel share one request, and
+    distinct channels collected in the window are fetched together. When
+    no lookup is in flight the batch is sent on the next loop iteration
+    instead of waiting out the window.
+    """
+    
+    def __init__(self, window: float = 0.02):
+        self.window = window
+        self._reset(None)
+    
+    def _reset(self, loop: Optional[asyncio.AbstractEventLoop]):
+        # Batching state belongs to one event loop; a timer scheduled on a
+        # loop that has since stopped must not leave later callers waiting
+        self.loop = loop
+        self.pending: Dict[Tuple[Tuple[str, str], str], asyncio.Future] = {}
+        self.clients: Dict[Tuple[Tuple[str, str], str], SlackClient] = {}
+        self.flush_task: Optional[asyncio.Task] = None
+        self.scheduled = False
+        self.inflight = 0
+    
+    async def get(self, client: SlackClient, channel_id: str) -> Dict:
+        """Return the conversations.info response for a channel"""
+        loop = asyncio.get_running_loop()
+        if loop is not self.loop:
+            self._reset(loop)
+        
+        # rate_limit_key identifies the workspace by token hash
+        key = (client.rate_limit_key, channel_id)
+        future = self.pending.get(key)
+        if future is None:
+            future = self.pending[key] = loop.create_future()
+            self.clients[key] = client
+            if not self.scheduled:
+                self.scheduled = True
+                if self.inflight:
+                    loop.call_later(self.window, self._start_flush)
+                else:
+                    loop.call_soon(self._start_flush)
+        # Shield so one cancelled caller doesn't cancel the others
+        return await asyncio.shield(future)
+    
+    def _start_flush(self):
+        self.flush_task = asyncio.ensure_future(self._flush())
+    
+    async def _flush(self):
+        pending, clients = self.pending, self.clients
+        self.pending, self.clients, self.scheduled = {}, {}, False
+        
+        self.inflight += 1
+        try:
+            keys = list(pending)
+            results = await asyncio.gather(
+                *(clients[key].conversations_info(key[1]) for key in keys),
+                return_exceptions=True
+            )
+        finally:
+            self.inflight -= 1
+        
+        for key, result in zip(keys, results):
+            future = pending[key]
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+# Shared batcher for conversations.info lookups
+info_batcher = _InfoBatcher()
+
+
+async def _scan_channels(client: SlackClient, channel_name: str, types: str) -> Optional[str]:
+    """Page through conversations of the given types looking for a channel name"""
+    async with aclosing(client.iter_conversations(types=types)) as channels:
+        async for ch in channels:
+            # Warm the cache with every channel seen along the way, leaving
+            # entries that are already cached alone
+            key = _channel_cache_key(client, ch["name"])
+            if _channel_id_cache.get(key) is None:
+                _channel_id_cache.set(key, ch["id"])
+            if ch["name"] == channel_name:
+                return ch["id"]
+    
+    return None
+
+
+async def find_channel_id(client: SlackClient, channel_name: str) -> Optional[str]:
+    """
+    Look up a channel ID by name (without #), or None if there is no such channel
+    
+    Results are cached, along with every other channel seen while scanning.
+    """
+    cached_id = _channel_id_cache.get(_channel_cache_key(client, channel_name))
+    if cached_id:
+        return cached_id
+    
+    # Scan public and private channels as two concurrent streams
+    scans = [
+        asyncio.create_task(_scan_channels(client, channel_name, types))
+        for types in ("public_channel", "private_channel")
+    ]
+    try:
+        for next_scan in asyncio.as_completed(scans):
+            channel_id = await next_scan
+            if channel_id:
+                return channel_id
+    finally:
+        for scan in scans:
+            scan.cancel()
+    
+    return None
 
 
 async def resolve_channel_id(client: SlackClient, channel: str) -> str:
@@ -25,24 +168,10 @@ async def resolve_channel_id(client: SlackClient, channel: str) -> str:
     # Remove # prefix if present
     channel_name = channel.lstrip('#')
     
-    # Search for channel using conversations.list
-    cursor = None
-    while True:
-        response = await client.conversations_list(cursor=cursor)
-        
-        if not response.get("ok"):
-            raise ValueError(f"Failed to list channels: {response.get('error')}")
-        
-        for ch in response.get("channels", []):
-            if ch["name"] == channel_name:
-                return ch["id"]
-        
-        # Check if there are more channels to search
-        cursor = response.get("response_metadata", {}).get("next_cursor")
-        if not cursor:
-            break
-    
-    raise ValueError(f"Channel '{channel_name}' not found")
+    channel_id = await find_channel_id(client, channel_name)
+    if channel_id is None:
+        raise ValueError(f"Channel '{channel_name}' not found")
+    return channel_id
 
 
 # Block Kit builder functions
@@ -107,31 +236,28 @@ def markdown_to_blocks(markdown: str) -> List[Dict]:
     Basic implementation for common markdown patterns
     """
     blocks = []
-    lines = markdown.split('\n')
     current_list_items = []
     
-    for i, line in enumerate(lines):
-        # Skip empty lines
+    def flush():
+        # Emit any pending list items as a single section
+        if current_list_items:
+            blocks.append(create_section_block('\n'.join(current_list_items)))
+            current_list_items.clear()
+    
+    lines = iter(markdown.split('\n'))
+    for line in lines:
+        # Skip empty lines (ending any list in progress)
         if not line.strip():
-            # If we were building a list, add it as a section
-            if current_list_items:
-                blocks.append(create_section_block('\n'.join(current_list_items)))
-                current_list_items = []
+            flush()
             continue
         
         # Headers
         if line.startswith('# '):
-            # Flush any pending list
-            if current_list_items:
-                blocks.append(create_section_block('\n'.join(current_list_items)))
-                current_list_items = []
+            flush()
             blocks.append(create_header_block(line[2:]))
         
-        elif line.startswith('## ') or line.startswith('### '):
-            # Flush any pending list
-            if current_list_items:
-                blocks.append(create_section_block('\n'.join(current_list_items)))
-                current_list_items = []
+        elif line.startswith(('## ', '### ')):
+            flush()
             # Convert to bold text in section
             text = line.lstrip('#').strip()
             blocks.append(create_section_block(f"*{text}*"))
@@ -142,48 +268,36 @@ def markdown_to_blocks(markdown: str) -> List[Dict]:
             item_text = line[2:].strip()
             current_list_items.append(f"• {item_text}")
         
-        elif line[0].isdigit() and '. ' in line[:4]:
+        elif num_match := _NUM_LIST.match(line):
             # Numbered list
-            parts = line.split('. ', 1)
-            if len(parts) == 2:
-                current_list_items.append(f"{parts[0]}. {parts[1]}")
+            current_list_items.append(f"{num_match.group(1)}. {num_match.group(2)}")
         
         # Divider
-        elif line.strip() in ['---', '***', '___']:
-            # Flush any pending list
-            if current_list_items:
-                blocks.append(create_section_block('\n'.join(current_list_items)))
-                current_list_items = []
+        elif line.strip() in ('---', '***', '___'):
+            flush()
             blocks.append(create_divider_block())
         
         # Code block
         elif line.startswith('```'):
-            # Flush any pending list
-            if current_list_items:
-                blocks.append(create_section_block('\n'.join(current_list_items)))
-                current_list_items = []
+            flush()
             
-            # Find the end of code block
+            # Consume lines up to the closing fence
             code_lines = []
-            i += 1
-            while i < len(lines) and not lines[i].startswith('```'):
-                code_lines.append(lines[i])
-                i += 1
+            for code_line in lines:
+                if code_line.startswith('```'):
+                    break
+                code_lines.append(code_line)
             
             code_text = '\n'.join(code_lines)
             blocks.append(create_section_block(f"```{code_text}```"))
         
         # Regular text
         else:
-            # Flush any pending list
-            if current_list_items:
-                blocks.append(create_section_block('\n'.join(current_list_items)))
-                current_list_items = []
+            flush()
             blocks.append(create_section_block(line))
     
     # Don't forget any remaining list items
-    if current_list_items:
-        blocks.append(create_section_block('\n'.join(current_list_items)))
+    flush()
     
     return blocks
 
@@ -199,64 +313,72 @@ def format_message_data(message: Dict, include_user: bool = True) -> Dict:
     Returns:
         Formatted message dict
     """
+    m_get = message.get
     formatted = {
-        "text": message.get("text", ""),
-        "ts": message.get("ts", ""),
-        "type": message.get("type", ""),
-        "thread_ts": message.get("thread_ts")
+        "text": m_get("text", ""),
+        "ts": m_get("ts", ""),
+        "type": m_get("type", ""),
+        "thread_ts": m_get("thread_ts")
     }
     
     if include_user:
-        formatted["user"] = message.get("user", "")
-        formatted["username"] = message.get("username")
+        formatted["user"] = m_get("user", "")
+        formatted["username"] = m_get("username")
     
     # Include thread info if present
     if "reply_count" in message:
         formatted["thread_info"] = {
-            "reply_count": message.get("reply_count", 0),
-            "reply_users_count": message.get("reply_users_count", 0),
-            "latest_reply": message.get("latest_reply"),
-            "subscribed": message.get("subscribed", False)
+            "reply_count": message["reply_count"],
+            "reply_users_count": m_get("reply_users_count", 0),
+            "latest_reply": m_get("latest_reply"),
+            "subscribed": m_get("subscribed", False)
         }
     
     # Include reactions if present
-    if "reactions" in message:
+    reactions = m_get("reactions")
+    if reactions is not None:
         formatted["reactions"] = [
             {
                 "name": r.get("name"),
                 "count": r.get("count"),
                 "users": r.get("users", [])
             }
-            for r in message.get("reactions", [])
+            for r in reactions
         ]
     
     # Include attachments if present
-    if "attachments" in message:
-        formatted["attachments"] = message["attachments"]
+    attachments = m_get("attachments")
+    if attachments is not None:
+        formatted["attachments"] = attachments
     
     # Include blocks if present
-    if "blocks" in message:
-        formatted["blocks"] = message["blocks"]
+    blocks = m_get("blocks")
+    if blocks is not None:
+        formatted["blocks"] = blocks
     
     return formatted
 
 
+def _replace_mrkdwn(match: re.Match) -> str:
+    """Render one mrkdwn token matched by _MRKDWN_RE"""
+    group = match.group
+    last = match.lastindex
+    if last == 1:
+        # User mention <@U123456> -> @U123456
+        return f"@{group(1)}"
+    if last == 2:
+        # Channel mention <#C123456|channel> -> #channel
+        return f"#{group(2)}"
+    if last == 4:
+        # Named link <http://example.com|Example> -> Example (http://example.com)
+        return f"{group(4)} ({group(3)})"
+    # Plain link <http://example.com> -> http://example.com
+    return group(5)
+
+
 def parse_message_text(text: str) -> str:
     """
     Parse Slack's mrkdwn format to more readable text
     This is a basic implementation
     """
-    # Convert user mentions <@U123456> to @user
-    import re
-    text = re.sub(r'<@(U\w+)>', r'@\1', text)
-    
-    # Convert channel mentions <#C123456|channel> to #channel
-    text = re.sub(r'<#C\w+\|([^>]+)>', r'#\1', text)
-    
-    # Convert links <http://example.com|Example> to Example (http://example.com)
-    text = re.sub(r'<(https?://[^|>]+)\|([^>]+)>', r'\2 (\1)', text)
-    
-    # Convert plain links <http://example.com> to http://example.com
-    text = re.sub(r'<(https?://[^>]+)>', r'\1', text)
-    
-    return text 
\ No newline at end of file
+    return _MRKDWN_RE.sub(_replace_mrkdwn, text)
@@ -3,11 +3,15 @@ San Francisco Time API Tool
 Provides current time and timezone information for San Francisco
 """
 
-from datetime import datetime
-import pytz
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
 from typing import Dict, Any
 
 
+# San Francisco timezone, built once at import
+_SF_TZ = ZoneInfo("America/Los_Angeles")
+
+
 async def get_san_francisco_time() -> Dict[str, Any]:
     """
     Get current time in San Francisco timezone
@@ -20,10 +24,10 @@ async def get_san_francisco_time() -> Dict[str, Any]:
         latitude = 37.7749
         longitude = -122.4194
         
-        # Get San Francisco timezone
-        sf_tz = pytz.timezone('America/Los_Angeles')
-        utc_now = datetime.now(pytz.UTC)
-        sf_time = utc_now.astimezone(sf_tz)
+        # Convert current UTC time to San Francisco time
+        # (no I/O here; async only to match the other tools)
+        utc_now = datetime.now(timezone.utc)
+        sf_time = utc_now.astimezone(_SF_TZ)
         
         return {
             "success": True,
@@ -33,7 +37,7 @@ async def get_san_francisco_time() -> Dict[str, Any]:
                 "longitude": longitude
             },
             "timezone": {
-                "name": sf_tz.zone,
+                "name": _SF_TZ.key,
                 "abbreviation": sf_time.strftime('%Z'),
                 "utc_offset": sf_time.strftime('%z')
             },
@@ -2,47 +2,91 @@
 Caching utilities for MCP server
 """
 
+import heapq
+import itertools
 import json
+import threading
 import time
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Hashable, List, Tuple
 from functools import wraps
 import hashlib
 
 
+# Argument types make_key_fast may use directly in a cache key (exact types,
+# so bool, which subclasses int, is excluded)
+_PLAIN_KEY_TYPES = (str, int, type(None))
+
+
+# Stale heap records tolerated on top of 2x the live entries before compacting
+_MIN_HEAP_COMPACT = 64
+
+
 class SimpleCache:
     """Simple in-memory cache implementation"""
     
     def __init__(self, ttl_seconds: int = 300):
-        self.cache: Dict[str, Dict[str, Any]] = {}
+        # key -> (expires_at, value), expiry on the monotonic clock
+        self.cache: Dict[Hashable, Tuple[float, Any]] = {}
         self.ttl_seconds = ttl_seconds
+        # Min-heap of (expires_at, seq, key) so expired entries are reaped
+        # even if they are never read again
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
     
-    def get(self, key: str) -> Optional[Any]:
+    def get(self, key: Hashable) -> Optional[Any]:
         """Get value from cache if not expired"""
-        if key in self.cache:
-            item = self.cache[key]
-            if time.time() < item["expires_at"]:
-                return item["value"]
-            else:
-                # Remove expired item
-                del self.cache[key]
-        return None
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() < expires_at:
+                return value
+            # Remove expired item
+            del self.cache[key]
+            return None
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+    def set(self, key: Hashable, value: Any, ttl: Optional[int] = None) -> None:
         """Set value in cache with expiration"""
         ttl = ttl or self.ttl_seconds
-        self.cache[key] = {
-            "value": value,
-            "expires_at": time.time() + ttl
-        }
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            self.cache[key] = (expires_at, value)
+            heapq.heappush(self._heap, (expires_at, next(self._seq), key))
+            self._evict_expired()
+            # Refreshed and deleted keys leave stale heap records behind;
+            # rebuild once they outnumber the live entries
+            if len(self._heap) > 2 * len(self.cache) + _MIN_HEAP_COMPACT:
+                self._compact_heap()
     
-    def delete(self, key: str) -> None:
+    def _evict_expired(self) -> None:
+        """Drop entries whose expiry has passed (caller holds the lock)"""
+        now = time.monotonic()
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, _, key = heapq.heappop(heap)
+            entry = self.cache.get(key)
+            # Skip heap records for keys that have since been refreshed
+            if entry is not None and entry[0] <= now:
+                del self.cache[key]
+    
+    def _compact_heap(self) -> None:
+        """Rebuild the heap from the live entries (caller holds the lock)"""
+        seq = self._seq
+        self._heap = [(expires_at, next(seq), key) for key, (expires_at, _) in self.cache.items()]
+        heapq.heapify(self._heap)
+    
+    def delete(self, key: Hashable) -> None:
         """Delete key from cache"""
-        if key in self.cache:
-            del self.cache[key]
+        with self._lock:
+            self.cache.pop(key, None)
     
     def clear(self) -> None:
         """Clear all cache entries"""
-        self.cache.clear()
+        with self._lock:
+            self.cache.clear()
+            self._heap.clear()
     
     def make_key(self, *args, **kwargs) -> str:
         """Create a cache key from arguments"""
@@ -50,8 +94,22 @@ class SimpleCache:
             "args": args,
             "kwargs": kwargs
         }
+        # sort_keys canonicalises nested dicts, unlike repr()
         key_str = json.dumps(key_data, sort_keys=True)
-        return hashlib.md5(key_str.encode()).hexdigest()
+        return hashlib.blake2b(key_str.encode(), digest_size=16).hexdigest()
+    
+    def make_key_fast(self, *args, **kwargs) -> Hashable:
+        """Create a cache key, using the arguments themselves when simple
+        
+        Only str, int and None arguments are used as-is: they compare
+        equal exactly when their JSON does, and holding them keeps no
+        larger object alive. Anything else (floats, bools, objects,
+        containers) falls back to make_key.
+        """
+        values = (*args, *kwargs.values())
+        if all(type(value) in _PLAIN_KEY_TYPES for value in values):
+            return (args, tuple(sorted(kwargs.items())))
+        return self.make_key(*args, **kwargs)
 
 
 # Global cache instance
@@ -61,10 +119,12 @@ cache = SimpleCache()
 def cached(ttl: Optional[int] = None):
     """Decorator for caching function results"""
     def decorator(func):
+        name = func.__qualname__
+        
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
             # Create cache key from function name and arguments
-            cache_key = f"{func.__name__}:{cache.make_key(*args, **kwargs)}"
+            cache_key = (name, cache.make_key_fast(*args, **kwargs))
             
             # Check cache
             cached_result = cache.get(cache_key)
@@ -79,7 +139,7 @@ def cached(ttl: Optional[int] = None):
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
             # Create cache key from function name and arguments
-            cache_key = f"{func.__name__}:{cache.make_key(*args, **kwargs)}"
+            cache_key = (name, cache.make_key_fast(*args, **kwargs))
             
             # Check cache
             cached_result = cache.get(cache_key)
@@ -0,0 +1,48 @@
+"""
+Shared API client pool for MCP server
+"""
+
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable
+
+
+def token_hash(token: str) -> str:
+    """Short digest of an API token, used wherever a token would be a key"""
+    return hashlib.sha1(token.encode()).hexdigest()[:16]
+
+
+class ClientPool:
+    """Shared API clients keyed by token hash, reused across tool calls
+
+    Tokens arrive as per-call tool arguments, so the pool is bounded: once
+    more than max_clients are held, the least recently used one is dropped
+    from the pool. It is not closed there, since a tool call may still be
+    using it; its connections are released when it is garbage collected.
+    Dropped clients are recreated on their next use.
+    """
+
+    def __init__(self, factory: Callable[[str], Any], max_clients: int = 32):
+        self.factory = factory
+        self.max_clients = max_clients
+        self.clients: "OrderedDict[str, Any]" = OrderedDict()
+
+    def get(self, token: str) -> Any:
+        """Return the shared client for a token, creating it on first use"""
+        key = token_hash(token)
+        client = self.clients.get(key)
+        if client is not None:
+            self.clients.move_to_end(key)
+            return client
+
+        client = self.clients[key] = self.factory(token)
+        if len(self.clients) > self.max_clients:
+            self.clients.popitem(last=False)
+        return client
+
+    async def close_all(self) -> None:
+        """Close every pooled client (they are recreated on next use)"""
+        clients = list(self.clients.values())
+        self.clients.clear()
+        await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
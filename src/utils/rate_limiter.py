@@ -2,114 +2,234 @@
 Rate limiting utilities for MCP server
 """
 
+import threading
 import time
-from typing import Dict, Optional
+import uuid
+from collections import OrderedDict, deque
+from collections.abc import Hashable
+from contextlib import asynccontextmanager
 from functools import wraps
 import asyncio
 
 
+# Number of independently locked bucket shards per RateLimiter (power of two)
+_SHARD_COUNT = 16
+_SHARD_MASK = _SHARD_COUNT - 1
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call is rejected by a rate limiter
+    
+    Only the rate limit key is stored; the message is built lazily so the
+    denial path does no string formatting unless the error is displayed.
+    """
+    
+    def __init__(self, key):
+        super().__init__(key)
+        self.key = key
+    
+    def __str__(self) -> str:
+        return f"Rate limit exceeded for {self.key}"
+
+
 class TokenBucket:
-    """Token bucket implementation for rate limiting"""
+    """Token bucket implementation for rate limiting
+    
+    Instead of a token count and a last-refill time, the bucket stores the
+    single instant at which it would be empty (zero_time). The available
+    tokens are derived from it on demand, so a consume is one field update.
+    """
+    
+    __slots__ = ("capacity", "refill_rate", "_inv_rate", "zero_time", "_lock")
     
     def __init__(self, capacity: int, refill_rate: float):
         self.capacity = capacity
-        self.tokens = capacity
         self.refill_rate = refill_rate
-        self.last_refill = time.time()
+        # Seconds per token, so the hot paths multiply instead of divide
+        self._inv_rate = 1.0 / refill_rate
+        # Start full: empty exactly capacity / refill_rate seconds ago
+        self.zero_time = time.monotonic() - capacity * self._inv_rate
+        # Guards the read-modify-write of zero_time across threads
+        self._lock = threading.Lock()
     
-    def consume(self, tokens: int = 1) -> bool:
+    @property
+    def tokens(self) -> float:
+        """Tokens currently available (negative while drained)"""
+        return min(self.capacity, (time.monotonic() - self.zero_time) * self.refill_rate)
+    
+    def consume(self, tokens: int = 1, _monotonic=time.monotonic, _min=min) -> bool:
         """Try to consume tokens from the bucket"""
-        self._refill()
-        
-        if self.tokens >= tokens:
-            self.tokens -= tokens
+        # Clock and min() are bound as defaults so they load as fast locals
+        with self._lock:
+            now = _monotonic()
+            # Saturate at capacity and take the tokens in one expression;
+            # a negative remainder means the request is denied
+            remaining = _min(self.capacity, (now - self.zero_time) * self.refill_rate) - tokens
+            if remaining < 0:
+                return False
+            self.zero_time = now - remaining * self._inv_rate
             return True
-        return False
     
-    def _refill(self):
-        """Refill tokens based on time elapsed"""
-        now = time.time()
-        elapsed = now - self.last_refill
-        tokens_to_add = elapsed * self.refill_rate
-        
-        self.tokens = min(self.capacity, self.tokens + tokens_to_add)
-        self.last_refill = now
+    def wait_time(self, tokens: int = 1) -> float:
+        """Seconds until the given number of tokens is available"""
+        return max(0.0, self.zero_time + tokens * self._inv_rate - time.monotonic())
+    
+    def drain(self, seconds: float = 0.0) -> None:
+        """Empty the bucket and keep it empty for the given number of seconds"""
+        with self._lock:
+            self.zero_time = time.monotonic() + seconds
 
 
 class RateLimiter:
-    """Rate limiter for API calls"""
+    """Rate limiter for API calls
+    
+    Buckets are spread over _SHARD_COUNT shards, each an LRU-ordered dict
+    with its own lock, so threads working on different keys rarely contend.
+    """
+    
+    __slots__ = ("_shards", "max_keys", "_shard_max_keys", "requests_per_minute", "burst", "refill_rate")
     
-    def __init__(self, requests_per_minute: int = 60, burst: int = 10):
-        self.buckets: Dict[str, TokenBucket] = {}
+    def __init__(self, requests_per_minute: int = 60, burst: int = 10, max_keys: int = 10_000):
+        # Keys may be any hashable, e.g. the (api, user_id) tuples used by
+        # APIRateLimiter
+        self._shards: list[tuple[OrderedDict[Hashable, TokenBucket], threading.Lock]] = [
+            (OrderedDict(), threading.Lock()) for _ in range(_SHARD_COUNT)
+        ]
+        # Least recently used buckets of a shard are dropped once it holds
+        # its share of max_keys
+        self.max_keys = max_keys
+        self._shard_max_keys = max(1, max_keys // _SHARD_COUNT)
         self.requests_per_minute = requests_per_minute
         self.burst = burst
         # Calculate refill rate (tokens per second)
         self.refill_rate = requests_per_minute / 60.0
     
-    def get_bucket(self, key: str) -> TokenBucket:
+    def get_bucket(self, key: Hashable) -> TokenBucket:
         """Get or create a token bucket for a key"""
-        if key not in self.buckets:
-            self.buckets[key] = TokenBucket(
-                capacity=self.burst,
-                refill_rate=self.refill_rate
-            )
-        return self.buckets[key]
-    
-    def check_rate_limit(self, key: str, tokens: int = 1) -> bool:
+        buckets, lock = self._shards[hash(key) & _SHARD_MASK]
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                self._evict_idle(buckets)
+                bucket = buckets[key] = TokenBucket(
+                    capacity=self.burst,
+                    refill_rate=self.refill_rate
+                )
+                if len(buckets) > self._shard_max_keys:
+                    buckets.popitem(last=False)
+            else:
+                buckets.move_to_end(key)
+            return bucket
+    
+    def _evict_idle(self, buckets: OrderedDict[Hashable, TokenBucket]):
+        """Drop least recently used buckets of a shard that have refilled completely
+        
+        A full bucket behaves exactly like a newly created one, so idle
+        keys can be forgotten without changing any rate limit decision.
+        The caller holds the shard's lock.
+        """
+        full_after = self.burst / self.refill_rate
+        now = time.monotonic()
+        while buckets:
+            oldest = next(iter(buckets.values()))
+            if now - oldest.zero_time < full_after:
+                break
+            buckets.popitem(last=False)
+    
+    def allow(self, key: Hashable, tokens: int = 1, _monotonic=time.monotonic, _min=min) -> bool:
+        """Consume tokens for a key if available
+        
+        Fuses get_bucket and TokenBucket.consume into a single frame for the
+        decorator hot path; the arithmetic mirrors TokenBucket.consume.
+        """
+        buckets, lock = self._shards[hash(key) & _SHARD_MASK]
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is not None:
+                buckets.move_to_end(key)
+        if bucket is None:
+            bucket = self.get_bucket(key)
+        
+        with bucket._lock:
+            now = _monotonic()
+            remaining = _min(bucket.capacity, (now - bucket.zero_time) * bucket.refill_rate) - tokens
+            if remaining < 0:
+                return False
+            bucket.zero_time = now - remaining * bucket._inv_rate
+            return True
+    
+    def wait_time(self, key: Hashable, tokens: int = 1) -> float:
+        """Seconds until a key has the given number of tokens
+        
+        Computed from the current clock, so it never reports a wait from a
+        stale token count. Unknown keys are full and get no bucket created.
+        """
+        buckets, lock = self._shards[hash(key) & _SHARD_MASK]
+        with lock:
+            bucket = buckets.get(key)
+        if bucket is None:
+            return 0.0
+        return bucket.wait_time(tokens)
+    
+    def check_rate_limit(self, key: Hashable, tokens: int = 1) -> bool:
         """Check if request is allowed under rate limit"""
-        bucket = self.get_bucket(key)
-        return bucket.consume(tokens)
+        return self.allow(key, tokens)
     
-    def reset(self, key: str):
+    def reset(self, key: Hashable):
         """Reset rate limit for a key"""
-        if key in self.buckets:
-            del self.buckets[key]
+        buckets, lock = self._shards[hash(key) & _SHARD_MASK]
+        with lock:
+            buckets.pop(key, None)
+
 
+# Global rate limiter instance, created on first use (see __getattr__)
+_rate_limiter: RateLimiter | None = None
+_instance_lock = threading.Lock()
 
-# Global rate limiter instance
-rate_limiter = RateLimiter()
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the global RateLimiter, creating it on first call"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _instance_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter()
+    return _rate_limiter
 
 
 def rate_limited(key_func=None, tokens: int = 1):
     """Decorator for rate limiting function calls"""
     def decorator(func):
-        @wraps(func)
-        async def async_wrapper(*args, **kwargs):
-            # Determine rate limit key
-            if key_func:
-                key = key_func(*args, **kwargs)
-            else:
-                # Default to function name
-                key = func.__name__
-            
-            # Check rate limit
-            if not rate_limiter.check_rate_limit(key, tokens):
-                raise Exception(f"Rate limit exceeded for {key}")
-            
-            # Call function
-            return await func(*args, **kwargs)
-        
-        @wraps(func)
-        def sync_wrapper(*args, **kwargs):
-            # Determine rate limit key
-            if key_func:
-                key = key_func(*args, **kwargs)
-            else:
-                # Default to function name
-                key = func.__name__
-            
-            # Check rate limit
-            if not rate_limiter.check_rate_limit(key, tokens):
-                raise Exception(f"Rate limit exceeded for {key}")
-            
-            # Call function
-            return func(*args, **kwargs)
-        
-        # Return appropriate wrapper
+        # Default to function name, resolved once at decoration time
+        default_key = func.__name__
+        
+        # Build only the wrapper that matches the function type
         if asyncio.iscoroutinefunction(func):
-            return async_wrapper
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                # Determine rate limit key
+                key = key_func(*args, **kwargs) if key_func is not None else default_key
+                
+                # Check rate limit
+                if not get_rate_limiter().allow(key, tokens):
+                    raise RateLimitExceeded(key)
+                
+                # Call function
+                return await func(*args, **kwargs)
         else:
-            return sync_wrapper
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                # Determine rate limit key
+                key = key_func(*args, **kwargs) if key_func is not None else default_key
+                
+                # Check rate limit
+                if not get_rate_limiter().allow(key, tokens):
+                    raise RateLimitExceeded(key)
+                
+                # Call function
+                return func(*args, **kwargs)
+        
+        return wrapper
     
     return decorator
 
@@ -117,6 +237,8 @@ def rate_limited(key_func=None, tokens: int = 1):
 class APIRateLimiter:
     """Specific rate limiter for external API calls"""
     
+    __slots__ = ("limits", "amplitude_costs", "amplitude_running_sum", "amplitude_active")
+    
     def __init__(self):
         self.limits = {
             "notion": RateLimiter(requests_per_minute=180, burst=20),
@@ -125,24 +247,23 @@ class APIRateLimiter:
             "amplitude": RateLimiter(requests_per_minute=360, burst=5),  # 360 queries/hour, 5 concurrent
         }
         # Amplitude-specific cost tracking
-        self.amplitude_costs: Dict[str, Dict[str, float]] = {}  # user_id -> {timestamp -> cost}
-        self.amplitude_concurrent: Dict[str, int] = {}  # user_id -> active_requests
+        self.amplitude_costs: dict[str, deque[tuple[float, int]]] = {}  # user_id -> (timestamp, cost) oldest first
+        self.amplitude_running_sum: dict[str, int] = {}  # user_id -> cost within the last hour
+        self.amplitude_active: dict[str, set[str]] = {}  # user_id -> ids of active requests
     
     def check_api_limit(self, api: str, user_id: str) -> bool:
         """Check rate limit for specific API and user"""
         if api in self.limits:
-            key = f"{api}:{user_id}"
-            return self.limits[api].check_rate_limit(key)
+            # Tuple key: no string formatting on every call
+            return self.limits[api].check_rate_limit((api, user_id))
         return True  # No limit defined
     
-    def wait_if_limited(self, api: str, user_id: str) -> Optional[float]:
+    def wait_if_limited(self, api: str, user_id: str) -> float | None:
         """Return wait time if rate limited, None if not limited"""
         if api in self.limits:
-            key = f"{api}:{user_id}"
-            bucket = self.limits[api].get_bucket(key)
-            if bucket.tokens < 1:
-                # Calculate wait time until next token
-                wait_time = (1 - bucket.tokens) / bucket.refill_rate
+            # Calculate wait time until next token
+            wait_time = self.limits[api].wait_time((api, user_id))
+            if wait_time > 0:
                 return wait_time
         return None
     
@@ -152,56 +273,96 @@ class APIRateLimiter:
     
     def check_amplitude_limits(self, user_id: str, cost: int) -> bool:
         """Check Amplitude-specific limits: cost per hour and concurrent requests"""
-        now = time.time()
+        now = time.monotonic()
         hour_ago = now - 3600  # 1 hour in seconds
         
         # Initialize user tracking if needed
-        if user_id not in self.amplitude_costs:
-            self.amplitude_costs[user_id] = {}
-        if user_id not in self.amplitude_concurrent:
-            self.amplitude_concurrent[user_id] = 0
+        user_costs = self.amplitude_costs.setdefault(user_id, deque())
+        current_hourly_cost = self.amplitude_running_sum.setdefault(user_id, 0)
+        active = self.amplitude_active.setdefault(user_id, set())
         
-        # Clean up old cost entries (older than 1 hour)
-        user_costs = self.amplitude_costs[user_id]
-        old_timestamps = [ts for ts in user_costs.keys() if float(ts) < hour_ago]
-        for ts in old_timestamps:
-            del user_costs[ts]
-        
-        # Calculate current hourly cost
-        current_hourly_cost = sum(user_costs.values())
+        # Drop cost entries older than 1 hour from the running total
+        while user_costs and user_costs[0][0] < hour_ago:
+            current_hourly_cost -= user_costs.popleft()[1]
+        self.amplitude_running_sum[user_id] = current_hourly_cost
         
         # Check cost limit (1000 cost per 5 minutes = 12000 per hour)
         if current_hourly_cost + cost > 12000:
             return False
         
         # Check concurrent requests limit (5 concurrent)
-        if self.amplitude_concurrent[user_id] >= 5:
+        if len(active) >= 5:
             return False
         
         return True
     
-    def start_amplitude_request(self, user_id: str, cost: int) -> bool:
-        """Start tracking an Amplitude request"""
+    def start_amplitude_request(self, user_id: str, cost: int) -> str | None:
+        """Start tracking an Amplitude request, returning its id (None if limited)"""
         if not self.check_amplitude_limits(user_id, cost):
-            return False
-        
-        now = time.time()
+            return None
         
         # Record the cost
-        self.amplitude_costs[user_id][str(now)] = cost
+        self.amplitude_costs[user_id].append((time.monotonic(), cost))
+        self.amplitude_running_sum[user_id] += cost
         
-        # Increment concurrent request counter
-        if user_id not in self.amplitude_concurrent:
-            self.amplitude_concurrent[user_id] = 0
-        self.amplitude_concurrent[user_id] += 1
+        # Register the request as active (set initialised by the check above)
+        request_id = uuid.uuid4().hex
+        self.amplitude_active[user_id].add(request_id)
         
-        return True
+        return request_id
+    
+    def end_amplitude_request(self, user_id: str, request_id: str | None = None):
+        """End tracking an Amplitude request
+        
+        Ids that are not active are ignored, so a stray or repeated call
+        cannot release another request's slot. Without an id, any one
+        active request is released.
+        """
+        active = self.amplitude_active.get(user_id)
+        if not active:
+            return
+        if request_id is None:
+            active.pop()
+        else:
+            active.discard(request_id)
     
-    def end_amplitude_request(self, user_id: str):
-        """End tracking an Amplitude request"""
-        if user_id in self.amplitude_concurrent and self.amplitude_concurrent[user_id] > 0:
-            self.amplitude_concurrent[user_id] -= 1
+    @asynccontextmanager
+    async def amplitude_request(self, user_id: str, cost: int):
+        """Track an Amplitude request for the duration of a with-block
+        
+        Raises RateLimitExceeded if the request is not allowed.
+        """
+        request_id = self.start_amplitude_request(user_id, cost)
+        if request_id is None:
+            raise RateLimitExceeded(("amplitude", user_id))
+        try:
+            yield request_id
+        finally:
+            self.end_amplitude_request(user_id, request_id)
 
 
-# Global API rate limiter
-api_rate_limiter = APIRateLimiter() 
\ No newline at end of file
+# Global API rate limiter, created on first use (see __getattr__)
+_api_rate_limiter: APIRateLimiter | None = None
+
+
+def get_api_rate_limiter() -> APIRateLimiter:
+    """Return the global APIRateLimiter, creating it on first call"""
+    global _api_rate_limiter
+    if _api_rate_limiter is None:
+        with _instance_lock:
+            if _api_rate_limiter is None:
+                _api_rate_limiter = APIRateLimiter()
+    return _api_rate_limiter
+
+
+def __getattr__(name: str):
+    """Create the rate_limiter and api_rate_limiter globals lazily (PEP 562)
+    
+    Processes that never rate limit skip building the limiters and their
+    bucket shards at import time.
+    """
+    if name == "rate_limiter":
+        return get_rate_limiter()
+    if name == "api_rate_limiter":
+        return get_api_rate_limiter()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")